@@ -1,6 +1,7 @@
 # matart/app.py
 
 import sys
+from collections import deque
 from PySide6.QtWidgets import (
     QApplication,
     QMainWindow,
@@ -14,6 +15,7 @@ from PySide6.QtWidgets import (
     QSpinBox,
     QDoubleSpinBox,
     QPushButton,
+    QCheckBox,
     QScrollArea
 )
 from PySide6.QtGui import QAction
@@ -71,6 +73,11 @@ class MainWindow(QMainWindow):
         self.anim_spin.setValue(0)
         form.addRow(QLabel("Animation speed (ms):"), self.anim_spin)
 
+        # Stroke shapes in their hue
+        self.hue_check = QCheckBox()
+        self.hue_check.toggled.connect(self._set_color_by_hue)
+        form.addRow(QLabel("Color by hue:"), self.hue_check)
+
         # Run button
         run_btn = QPushButton("Run")
         run_btn.clicked.connect(self.run_sequence)
@@ -92,7 +99,7 @@ class MainWindow(QMainWindow):
         # Timer for animation
         self.timer = QTimer()
         self.timer.timeout.connect(self._animate_step)
-        self._pending_shapes = []
+        self._pending_shapes = deque()
 
     def run_sequence(self):
         # Stop any existing animation
@@ -102,13 +109,11 @@ class MainWindow(QMainWindow):
         shape_name = self.canvas.current_shape or "square"
         start_shape = Shape(
             name=shape_name,
-            params={
-                "x": 0.0,
-                "y": 0.0,
-                "size": self.size_spin.value(),
-                "angle": 0.0,
-                "hue": 0.0
-            }
+            x=0.0,
+            y=0.0,
+            size=self.size_spin.value(),
+            angle=0.0,
+            hue=0.0
         )
         # Generate full sequence
         rule_key = self.rule_combo.currentText()
@@ -123,19 +128,20 @@ class MainWindow(QMainWindow):
         speed = self.anim_spin.value()
         if speed > 0:
             self.canvas.shapes = []
-            self._pending_shapes = shapes.copy()
+            self._pending_shapes = deque(shapes)
             self.timer.start(speed)
         else:
             self.canvas.shapes = shapes
-            self.canvas.update()
+
+    def _set_color_by_hue(self, enabled: bool):
+        self.canvas.color_by_hue = enabled
 
     def _animate_step(self):
         if not self._pending_shapes:
             self.timer.stop()
             return
         # Append next shape
-        self.canvas.shapes.append(self._pending_shapes.pop(0))
-        self.canvas.update()
+        self.canvas.add_shape(self._pending_shapes.popleft())
 
 
 def main():
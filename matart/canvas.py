@@ -1,22 +1,88 @@
 # matart/canvas.py
 
+import math
+
 from PySide6.QtWidgets import QWidget
-from PySide6.QtGui import QPainter, QPen
+from PySide6.QtGui import QColor, QPainter, QPainterPath, QPen, QPixmap, QPolygonF
 from PySide6.QtGui     import QPalette
-from PySide6.QtCore import Qt, QPointF
+from PySide6.QtCore import Qt, QLineF, QPointF, QRect, QRectF, QTimer
+
+import numpy as np
+
+from .geometry import Line, Shape, hues_to_rgb
+
+BLACK = (0, 0, 0)
+
+def _regular_polygon(n: int, start_deg: float) -> tuple:
+    # unit-circumradius (x, y) vertices
+    return tuple(
+        (math.cos(math.radians(start_deg + k * 360.0 / n)),
+         math.sin(math.radians(start_deg + k * 360.0 / n)))
+        for k in range(n)
+    )
 
-from .geometry import Shape
+# shape name -> unit vertex template, scaled by size/2 and moved to the shape center
+POLYGON_TEMPLATES = {
+    "triangle": _regular_polygon(3, -90.0),
+    "diamond": _regular_polygon(4, -90.0),
+    "polygon": _regular_polygon(6, 0.0),
+}
+
+def _shape_polygon(shape: Shape, template: tuple) -> QPolygonF:
+    x, y, r = shape.x, shape.y, shape.size * 0.5
+    return QPolygonF([QPointF(x + r * cx, y + r * cy) for cx, cy in template])
+
+def _shape_bbox(shape: Shape):
+    # scene-space (x0, y0, x1, y1) of a shape
+    if isinstance(shape, Line):
+        x1, y1, x2, y2 = shape.x1, shape.y1, shape.x2, shape.y2
+        return min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)
+    half = shape.size / 2
+    return shape.x - half, shape.y - half, shape.x + half, shape.y + half
 
 class CanvasWidget(QWidget):
+    # wheel/pan input is folded into at most one repaint per frame
+    FRAME_INTERVAL_MS = 16
+    # distinct (color, width) pens kept before the pen cache is reset
+    PEN_CACHE_SIZE = 512
+
+    # shape name -> QPainter / QPainterPath method taking the shape's bounding rect
+    _DRAWERS = {
+        "square": QPainter.drawRect,
+        "circle": QPainter.drawEllipse,
+    }
+    _PATH_ADDERS = {
+        "square": QPainterPath.addRect,
+        "circle": QPainterPath.addEllipse,
+    }
+
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.shapes = []               # list of Shape instances
+        self._shapes = []              # list of Shape instances
         self.offset = QPointF(0, 0)    # pan offset
         self.scale = 1.0               # zoom level
         self.current_shape = None      # e.g. "square", "circle"
 
         self._last_pan_pos = None      # track pan start point
 
+        # zoom/pan accumulated since the last scheduled repaint
+        self._pending_scale = 1.0
+        self._pending_pan = QPointF(0, 0)
+        self._update_timer = QTimer(self)
+        self._update_timer.setSingleShot(True)
+        self._update_timer.setInterval(self.FRAME_INTERVAL_MS)
+        self._update_timer.timeout.connect(self._flush_update)
+
+        # shapes batched into one path per stroke color
+        self._cached_paths: dict[tuple, QPainterPath] | None = None
+        self._cache_dirty = True
+        self._color_by_hue = False     # stroke shapes in their hue instead of black
+        self._pen_cache: dict[tuple, QPen] = {}   # (rgb, width) -> shared pen
+
+        # widget-sized render of the scene at the current pan/zoom; repaints
+        # blit from it and new shapes are painted onto it incrementally
+        self._backbuffer: QPixmap | None = None
+
         # Make the widget background white
         self.setAutoFillBackground(True)
         pal = self.palette()
@@ -25,53 +91,186 @@ class CanvasWidget(QWidget):
 
         self.setMouseTracking(True)
     
+    @property
+    def shapes(self):
+        return self._shapes
+
+    @shapes.setter
+    def shapes(self, shapes):
+        self._shapes = shapes
+        self._cache_dirty = True
+        self._backbuffer = None
+        self.update()
+
+    @property
+    def color_by_hue(self):
+        return self._color_by_hue
+
+    @color_by_hue.setter
+    def color_by_hue(self, enabled: bool):
+        self._color_by_hue = enabled
+        self._cache_dirty = True
+        self._backbuffer = None
+        self.update()
+
+    def add_shape(self, shape: Shape):
+        # append one shape and repaint only the area it covers
+        self._shapes.append(shape)
+        color = BLACK
+        if self._color_by_hue:
+            color = tuple(hues_to_rgb(np.array([shape.hue]))[0].tolist())
+        if not self._cache_dirty and self._cached_paths is not None:
+            path = self._cached_paths.get(color)
+            if path is None:
+                path = self._cached_paths[color] = QPainterPath()
+            self._add_to_path(path, shape)
+        if self._backbuffer is not None:
+            painter = self._scene_painter(self._backbuffer)
+            painter.setPen(self._pen(color))
+            self._draw_shape(painter, shape)
+            painter.end()
+        self.update(self._widget_rect(shape))
+
+    def _widget_rect(self, shape: Shape) -> QRect:
+        # widget-space rectangle covering a shape, padded for the pen
+        x0, y0, x1, y1 = _shape_bbox(shape)
+        left = x0 * self.scale + self.offset.x()
+        top = y0 * self.scale + self.offset.y()
+        right = x1 * self.scale + self.offset.x()
+        bottom = y1 * self.scale + self.offset.y()
+        pad = max(abs(self.scale), 1) + 1
+        return QRect(int(min(left, right) - pad), int(min(top, bottom) - pad),
+                     int(abs(right - left) + 2 * pad) + 1, int(abs(bottom - top) + 2 * pad) + 1)
+
     def set_current_shape(self, name: str):
         self.current_shape = name
 
     def paintEvent(self, event):
+        if self._backbuffer is None:
+            self._backbuffer = self._render_backbuffer()
         painter = QPainter(self)
+        # only the exposed rectangle is copied from the backbuffer
+        painter.setClipRect(event.rect())
+        painter.drawPixmap(0, 0, self._backbuffer)
+
+    def resizeEvent(self, event):
+        self._backbuffer = None
+        super().resizeEvent(event)
+
+    def _scene_painter(self, device) -> QPainter:
+        # painter on device set up with the scene transform and shape pen
+        painter = QPainter(device)
         painter.setRenderHint(QPainter.Antialiasing)
-        # paint a white background just in case
-        painter.fillRect(self.rect(), Qt.white)
         painter.translate(self.offset)
         painter.scale(self.scale, self.scale)
-
-        pen = QPen(Qt.black, 1)
-        painter.setPen(pen)
+        painter.setPen(self._pen(BLACK))
         painter.setBrush(Qt.NoBrush)
+        return painter
 
-        for shape in self.shapes:
-            self._draw_shape(painter, shape)
+    def _pen(self, rgb: tuple, width: float = 1) -> QPen:
+        # pens are interned so each color is constructed once
+        pen = self._pen_cache.get((rgb, width))
+        if pen is None:
+            if len(self._pen_cache) >= self.PEN_CACHE_SIZE:
+                self._pen_cache.clear()
+            pen = self._pen_cache[(rgb, width)] = QPen(QColor(*rgb), width)
+        return pen
+
+    def _render_backbuffer(self) -> QPixmap:
+        # stroke the batched scene with one call per color
+        if self._cache_dirty or self._cached_paths is None:
+            self._cached_paths = self._build_paths()
+            self._cache_dirty = False
+        dpr = self.devicePixelRatioF()
+        pixmap = QPixmap(self.size() * dpr)
+        pixmap.setDevicePixelRatio(dpr)
+        pixmap.fill(Qt.white)
+        painter = self._scene_painter(pixmap)
+        for color, path in self._cached_paths.items():
+            painter.setPen(self._pen(color))
+            painter.drawPath(path)
+        painter.end()
+        return pixmap
+
+    def _build_paths(self) -> dict[tuple, QPainterPath]:
+        # scene-coordinate paths grouped by color; pan/zoom only re-stroke them
+        if not self._color_by_hue:
+            path = QPainterPath()
+            for shape in self._shapes:
+                self._add_to_path(path, shape)
+            return {BLACK: path}
+        hues = np.fromiter((s.hue for s in self._shapes), dtype=float, count=len(self._shapes))
+        rgb_table = hues_to_rgb(hues)
+        paths: dict[tuple, QPainterPath] = {}
+        for shape, color in zip(self._shapes, map(tuple, rgb_table.tolist())):
+            path = paths.get(color)
+            if path is None:
+                path = paths[color] = QPainterPath()
+            self._add_to_path(path, shape)
+        return paths
+
+    def _add_to_path(self, path: QPainterPath, shape: Shape):
+        if isinstance(shape, Line):
+            path.moveTo(shape.x1, shape.y1)
+            path.lineTo(shape.x2, shape.y2)
+            return
+        adder = self._PATH_ADDERS.get(shape.name)
+        if adder is not None:
+            size = shape.size
+            adder(path, QRectF(shape.x - size * 0.5, shape.y - size * 0.5, size, size))
+            return
+        template = POLYGON_TEMPLATES.get(shape.name)
+        if template is not None:
+            path.addPolygon(_shape_polygon(shape, template))
+            path.closeSubpath()
 
     def _draw_shape(self, painter: QPainter, shape: Shape):
-        p = shape.params
-        x, y = p.get("x", 0), p.get("y", 0)
-        size = p.get("size", 100)
-        if shape.name == "square":
-            painter.drawRect(x - size/2, y - size/2, size, size)
-        elif shape.name == "circle":
-            painter.drawEllipse(x - size/2, y - size/2, size, size)
-        # TODO: add triangle, diamond, polygons
+        if isinstance(shape, Line):
+            painter.drawLine(QLineF(shape.x1, shape.y1, shape.x2, shape.y2))
+            return
+        drawer = self._DRAWERS.get(shape.name)
+        if drawer is not None:
+            size = shape.size
+            drawer(painter, QRectF(shape.x - size * 0.5, shape.y - size * 0.5, size, size))
+            return
+        template = POLYGON_TEMPLATES.get(shape.name)
+        if template is not None:
+            painter.drawPolygon(_shape_polygon(shape, template))
+
+    def _schedule_update(self):
+        if not self._update_timer.isActive():
+            self._update_timer.start()
+
+    def _apply_pending(self):
+        if self._pending_scale == 1.0 and self._pending_pan.isNull():
+            return
+        self._backbuffer = None
+        self.scale *= self._pending_scale
+        self.offset += self._pending_pan
+        self._pending_scale = 1.0
+        self._pending_pan = QPointF(0, 0)
+
+    def _flush_update(self):
+        self._apply_pending()
+        self.update()
 
     def mousePressEvent(self, event):
         if event.button() == Qt.LeftButton and self.current_shape:
+            # bring the view up to date before mapping the click
+            self._apply_pending()
             # map from widget coords to scene coords
             pt = event.position()
             scene_x = (pt.x() - self.offset.x()) / self.scale
             scene_y = (pt.y() - self.offset.y()) / self.scale
-            shape = Shape(
-                name=self.current_shape,
-                params={"x": scene_x, "y": scene_y, "size": 100}
-            )
-            self.shapes.append(shape)
-            self.update()
+            shape = Shape(name=self.current_shape, x=scene_x, y=scene_y, size=100)
+            self.add_shape(shape)
 
     def wheelEvent(self, event):
         # zoom on scroll
         angle = event.angleDelta().y()
         factor = 1 + angle / 240.0
-        self.scale *= factor
-        self.update()
+        self._pending_scale *= factor
+        self._schedule_update()
 
     def mouseMoveEvent(self, event):
         # pan on right-click drag
@@ -81,9 +280,9 @@ class CanvasWidget(QWidget):
                 self._last_pan_pos = event.position()
             else:
                 delta = event.position() - self._last_pan_pos
-                self.offset += delta
+                self._pending_pan += delta
                 self._last_pan_pos = event.position()
-                self.update()
+                self._schedule_update()
 
     def mouseReleaseEvent(self, event):
         # reset pan tracker
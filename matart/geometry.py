@@ -2,126 +2,321 @@
 # 
 # Defines geometric primitives, transformation rules, and presets for generative art.
 
+import functools
+import itertools
 import math
-from typing import NamedTuple, List, Dict
+import warnings
+from dataclasses import dataclass
+from typing import List
 
-class Shape(NamedTuple):
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional: kernels run as plain Python without it
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda fn: fn
+
+_SQRT2 = math.sqrt(2.0)
+
+@dataclass(slots=True)
+class Shape:
     """
-    A geometric shape with a name and parameters dictionary.
-    params may include:
+    A geometric shape with a name and flat numeric fields:
       - x, y: center coordinates
       - size: scale or radius
       - angle: rotation in degrees
       - hue: color hue (0–360)
-      - For line: x1, y1, x2, y2
     """
     name: str
-    params: Dict[str, float]
+    x: float = 0.0
+    y: float = 0.0
+    size: float = 1.0
+    angle: float = 0.0
+    hue: float = 0.0
+
+@dataclass(slots=True)
+class Line(Shape):
+    """
+    A line segment from (x1, y1) to (x2, y2).
+    """
+    x1: float = 0.0
+    y1: float = 0.0
+    x2: float = 0.0
+    y2: float = 0.0
+
+# Numeric Shape fields mirrored by ShapeArray's buffers
+SHAPE_FIELDS = ("x", "y", "size", "angle", "hue")
+
+@dataclass(frozen=True)
+class ShapeArray:
+    """
+    A sequence of same-named shapes stored as a struct of arrays.
+    Each field is a contiguous float64 buffer indexed by step, except
+    angles, which are uint16 tenths of a degree in [0, 3600).
+    """
+    name: str
+    xs: np.ndarray
+    ys: np.ndarray
+    sizes: np.ndarray
+    angles: np.ndarray
+    hues: np.ndarray
+
+    @classmethod
+    def full(cls, start: Shape, n: int) -> "ShapeArray":
+        """Return n copies of start, ready for a rule to update in place."""
+        return cls(
+            name=start.name,
+            xs=np.full(n, start.x, dtype=np.float64),
+            ys=np.full(n, start.y, dtype=np.float64),
+            sizes=np.full(n, start.size, dtype=np.float64),
+            angles=np.full(n, _to_decidegrees(start.angle), dtype=np.uint16),
+            hues=np.full(n, start.hue, dtype=np.float64),
+        )
+
+    def __len__(self) -> int:
+        return len(self.xs)
+
+    def freeze(self) -> "ShapeArray":
+        """Mark every buffer read-only, so a shared instance can't be changed."""
+        for values in (self.xs, self.ys, self.sizes, self.angles, self.hues):
+            values.flags.writeable = False
+        return self
+
+    def to_shapes(self, start: Shape = None, varying=SHAPE_FIELDS) -> List[Shape]:
+        """
+        Unpack into Shape objects. Given the start shape, element 0 is start
+        itself and fields not listed in `varying` are copied from it exactly
+        instead of round-tripping through the buffers.
+        """
+        def column(field, values):
+            if start is not None and field not in varying:
+                return itertools.repeat(getattr(start, field), len(self))
+            return values.tolist()
+
+        # positional construction through map() keeps the per-shape cost low
+        shapes = list(map(
+            Shape, itertools.repeat(self.name, len(self)),
+            column("x", self.xs), column("y", self.ys), column("size", self.sizes),
+            column("angle", self.angles / 10), column("hue", self.hues)
+        ))
+        if start is not None and shapes:
+            shapes[0] = start
+        return shapes
+
+def _to_decidegrees(angle: float) -> int:
+    # degrees -> tenths of a degree wrapped into [0, 3600)
+    return round(angle * 10) % 3600
+
+def _is_decidegree(angle: float) -> bool:
+    # True if angle survives _to_decidegrees without rounding
+    return abs(angle * 10 - round(angle * 10)) < 1e-6
+
+# --- Color ---------------------------------------------------------------------------
+
+def hues_to_rgb(hues: np.ndarray) -> np.ndarray:
+    # vectorized HSV -> RGB at full saturation and value; (N,) hues -> (N, 3) uint8
+    h = np.mod(hues, 360.0) / 60.0
+    sector = np.floor(h).astype(np.int64) % 6
+    rising = h - np.floor(h)
+    falling = 1.0 - rising
+    one = np.ones_like(h)
+    zero = np.zeros_like(h)
+    conds = [sector == k for k in range(6)]
+    r = np.select(conds, [one, falling, zero, zero, rising, one])
+    g = np.select(conds, [rising, one, one, falling, zero, zero])
+    b = np.select(conds, [zero, zero, rising, one, one, falling])
+    return np.rint(np.stack([r, g, b], axis=1) * 255).astype(np.uint8)
 
 # --- Primitive Rule Implementations ---------------------------------------------------
 
-def rule_scale_by_diagonal(shape: Shape, **kwargs) -> Shape:
-    size = shape.params.get("size", 1)
-    diag = size * math.sqrt(2)
-    x = shape.params.get("x", 0) + (size + diag) / 2
-    y = shape.params.get("y", 0)
-    return Shape(
-        name=shape.name,
-        params={"x": x, "y": y, "size": diag,
-                "angle": shape.params.get("angle", 0),
-                "hue": shape.params.get("hue", 0)}
-    )
+def rule_scale_by_diagonal(shape: Shape) -> Shape:
+    size = shape.size
+    diag = _SQRT2 * size
+    x = shape.x + (size + diag) / 2
+    return Shape(name=shape.name, x=x, y=shape.y, size=diag,
+                 angle=shape.angle, hue=shape.hue)
 
-def rule_uniform_scale(shape: Shape, **kwargs) -> Shape:
-    factor = kwargs.get("scale_factor", 1.1)
-    prev = shape.params.get("size", 1)
-    new_size = prev * factor
-    x = shape.params.get("x", 0) + (prev + new_size) / 2
-    y = shape.params.get("y", 0)
-    return Shape(
-        name=shape.name,
-        params={"x": x, "y": y, "size": new_size,
-                "angle": shape.params.get("angle", 0),
-                "hue": shape.params.get("hue", 0)}
-    )
+def rule_uniform_scale(shape: Shape, scale_factor: float = 1.1) -> Shape:
+    prev = shape.size
+    new_size = prev * scale_factor
+    x = shape.x + (prev + new_size) / 2
+    return Shape(name=shape.name, x=x, y=shape.y, size=new_size,
+                 angle=shape.angle, hue=shape.hue)
 
-def rule_rotate(shape: Shape, **kwargs) -> Shape:
-    inc = kwargs.get("rotation_increment", 30)
-    angle = (shape.params.get("angle", 0) + inc) % 360
-    return Shape(
-        name=shape.name,
-        params={"x": shape.params.get("x", 0),
-                "y": shape.params.get("y", 0),
-                "size": shape.params.get("size", 1),
-                "angle": angle,
-                "hue": shape.params.get("hue", 0)}
-    )
+def rule_rotate(shape: Shape, rotation_increment: float = 30) -> Shape:
+    """
+    Rotate by rotation_increment degrees, wrapped into [0, 360).
+    Sequences built by generate_sequence store angles in 0.1 degree steps,
+    so there the increment must be a multiple of 0.1.
+    """
+    angle = shape.angle + rotation_increment
+    # in-range inputs land in [0, 720): wrap with a subtract, not a modulo
+    if angle >= 360.0:
+        angle = angle - 360.0 if angle < 720.0 else angle % 360
+    elif angle < 0.0:
+        angle %= 360
+    return Shape(name=shape.name, x=shape.x, y=shape.y, size=shape.size,
+                 angle=angle, hue=shape.hue)
+
+def rule_translate(shape: Shape, translate_dx: float = None, translate_dy: float = 0) -> Shape:
+    # dx defaults to the shape's own size
+    dx = shape.size if translate_dx is None else translate_dx
+    return Shape(name=shape.name, x=shape.x + dx, y=shape.y + translate_dy,
+                 size=shape.size, angle=shape.angle, hue=shape.hue)
+
+def rule_hue_shift(shape: Shape, hue_shift: float = 10) -> Shape:
+    hue = shape.hue + hue_shift
+    if hue >= 360.0:
+        hue = hue - 360.0 if hue < 720.0 else hue % 360
+    elif hue < 0.0:
+        hue %= 360
+    return Shape(name=shape.name, x=shape.x, y=shape.y, size=shape.size,
+                 angle=shape.angle, hue=hue)
+
+# --- Closed-Form Sequence Kernels --------------------------------------------------
+#
+# Every primitive rule is a linear recurrence, so step i has a closed form.
+# Each kernel receives a ShapeArray filled with copies of the start shape and
+# rewrites it in place so that element i equals the rule applied i times.
+
+def _geometric_growth(arr: ShapeArray, factor: float) -> None:
+    # size_i = s0 * f**i; x advances by (size_k + size_k+1) / 2 each step,
+    # which telescopes to s0 * (1 + f) / 2 * (f**i - 1) / (f - 1).
+    steps = np.arange(len(arr), dtype=np.float64)
+    s0, x0 = float(arr.sizes[0]), float(arr.xs[0])
+    powers = factor ** steps
+    arr.sizes[:] = s0 * powers
+    if factor == 1:
+        arr.xs[:] = x0 + s0 * steps
+    else:
+        arr.xs[:] = x0 + s0 * (1 + factor) * 0.5 * (powers - 1) / (factor - 1)
+
+def _seq_scale_by_diagonal(arr: ShapeArray, **kwargs) -> None:
+    _geometric_growth(arr, _SQRT2)
+
+def _seq_uniform_scale(arr: ShapeArray, **kwargs) -> None:
+    _geometric_growth(arr, kwargs.get("scale_factor", 1.1))
+
+def _seq_rotate(arr: ShapeArray, **kwargs) -> None:
+    # integer tenths of a degree, so the wrap is an exact integer modulo
+    increment = kwargs.get("rotation_increment", 30)
+    if not _is_decidegree(increment):
+        raise ValueError(f"rotation_increment must be a multiple of 0.1 degrees, got {increment}")
+    inc = round(increment * 10)
+    steps = np.arange(len(arr), dtype=np.int64)
+    arr.angles[:] = np.mod(int(arr.angles[0]) + inc * steps, 3600)
 
-def rule_translate(shape: Shape, **kwargs) -> Shape:
-    dx = kwargs.get("translate_dx", shape.params.get("size", 1))
+def _seq_translate(arr: ShapeArray, **kwargs) -> None:
+    dx = kwargs.get("translate_dx")
+    if dx is None:
+        dx = float(arr.sizes[0])
     dy = kwargs.get("translate_dy", 0)
-    return Shape(
-        name=shape.name,
-        params={"x": shape.params.get("x", 0) + dx,
-                "y": shape.params.get("y", 0) + dy,
-                "size": shape.params.get("size", 1),
-                "angle": shape.params.get("angle", 0),
-                "hue": shape.params.get("hue", 0)}
-    )
+    steps = np.arange(len(arr), dtype=np.float64)
+    arr.xs[:] = float(arr.xs[0]) + dx * steps
+    arr.ys[:] = float(arr.ys[0]) + dy * steps
 
-def rule_hue_shift(shape: Shape, **kwargs) -> Shape:
+def _seq_hue_shift(arr: ShapeArray, **kwargs) -> None:
     delta = kwargs.get("hue_shift", 10)
-    hue = (shape.params.get("hue", 0) + delta) % 360
-    return Shape(
-        name=shape.name,
-        params={"x": shape.params.get("x", 0),
-                "y": shape.params.get("y", 0),
-                "size": shape.params.get("size", 1),
-                "angle": shape.params.get("angle", 0),
-                "hue": hue}
-    )
+    arr.hues[:] = (float(arr.hues[0]) + delta * np.arange(len(arr), dtype=np.float64)) % 360
 
 # --- Preset Generators --------------------------------------------------------------
 
-def generate_fibonacci_spiral(start: Shape, iterations: int = 5, **kwargs) -> List[Shape]:
+@njit(cache=True)
+def _fib_spiral_core(x0: float, y0: float, size0: float, iterations: int) -> np.ndarray:
+    """
+    Return an (iterations x 4) array of x, y, size, angle for a spiral of
+    squares whose sizes follow the Fibonacci sequence.
+    """
     # Fibonacci sequence of sizes
-    fib = [start.params.get("size", 1)] * 2
-    for _ in range(2, iterations):
-        fib.append(fib[-1] + fib[-2])
-    seq: List[Shape] = []
+    fib = np.empty(iterations)
+    for i in range(iterations):
+        fib[i] = size0 if i < 2 else fib[i - 1] + fib[i - 2]
     # Four direction cycle: right, up, left, down
-    dirs = [(1, 0), (0, 1), (-1, 0), (0, -1)]
-    x, y = start.params.get("x", 0), start.params.get("y", 0)
-    for i, size in enumerate(fib[:iterations]):
-        dx, dy = dirs[i % 4]
+    dirs = np.array([[1.0, 0.0], [0.0, 1.0], [-1.0, 0.0], [0.0, -1.0]])
+    out = np.empty((iterations, 4))
+    x, y = x0, y0
+    for i in range(iterations):
         if i > 0:
-            prev = fib[i - 1]
-            x += dx * (prev + size) / 2
-            y += dy * (prev + size) / 2
-        seq.append(Shape(
-            name=start.name,
-            params={"x": x, "y": y, "size": size,
-                    "angle": (i % 4) * 90,
-                    "hue": start.params.get("hue", 0)}
-        ))
-    return seq
+            step = (fib[i - 1] + fib[i]) / 2
+            x += dirs[i % 4, 0] * step
+            y += dirs[i % 4, 1] * step
+        out[i, 0] = x
+        out[i, 1] = y
+        out[i, 2] = fib[i]
+        out[i, 3] = (i % 4) * 90
+    return out
 
+def generate_fibonacci_spiral(start: Shape, iterations: int = 5, **kwargs) -> List[Shape]:
+    hue = start.hue
+    core = _fib_spiral_core(float(start.x), float(start.y), float(start.size), max(iterations, 0))
+    xs, ys, sizes, angles = core.T.tolist()
+    return list(map(Shape, itertools.repeat(start.name, len(xs)), xs, ys, sizes, angles,
+                    itertools.repeat(hue, len(xs))))
 
-def generate_koch_snowflake(start: Shape, iterations: int = 3, **kwargs) -> List[Shape]:
-    # Simple placeholder: returns initial triangle as 3 lines
-    size = start.params.get("size", 1)
+
+# Refinement depth is capped: each level multiplies the segment count by 4,
+# and past 3072 segments further detail is sub-pixel at typical sizes.
+KOCH_MAX_DEPTH = 5
+
+@njit(cache=True)
+def _koch_expand(points: np.ndarray, iterations: int) -> np.ndarray:
+    """
+    Refine the closed polygon `points` (n x 2) `iterations` times, returning
+    an (n * 4**iterations) x 4 float32 array of x1, y1, x2, y2 segments.
+    """
+    n = points.shape[0]
+    out = np.empty((n * 4 ** iterations, 4), dtype=np.float32)
+    for i in range(n):
+        out[i, 0] = points[i, 0]
+        out[i, 1] = points[i, 1]
+        out[i, 2] = points[(i + 1) % n, 0]
+        out[i, 3] = points[(i + 1) % n, 1]
+    cos60 = math.cos(math.pi / 3)
+    sin60 = math.sin(math.pi / 3)
+    count = n
+    for _ in range(iterations):
+        # Walk back to front so segment i is read before slots 4i..4i+3 are written
+        for i in range(count - 1, -1, -1):
+            x1, y1, x2, y2 = out[i, 0], out[i, 1], out[i, 2], out[i, 3]
+            dx = (x2 - x1) / 3
+            dy = (y2 - y1) / 3
+            ax, ay = x1 + dx, y1 + dy
+            bx, by = x1 + 2 * dx, y1 + 2 * dy
+            # Peak: the middle third rotated outward by 60 degrees
+            px = ax + dx * cos60 + dy * sin60
+            py = ay - dx * sin60 + dy * cos60
+            j = 4 * i
+            out[j, 0], out[j, 1], out[j, 2], out[j, 3] = x1, y1, ax, ay
+            out[j + 1, 0], out[j + 1, 1], out[j + 1, 2], out[j + 1, 3] = ax, ay, px, py
+            out[j + 2, 0], out[j + 2, 1], out[j + 2, 2], out[j + 2, 3] = px, py, bx, by
+            out[j + 3, 0], out[j + 3, 1], out[j + 3, 2], out[j + 3, 3] = bx, by, x2, y2
+        count *= 4
+    return out
+
+@functools.lru_cache(maxsize=8)
+def _koch_segments_cached(size: float, depth: int) -> np.ndarray:
+    # Keyed on the clamped depth, so oversized iteration counts share one entry
     # Equilateral triangle vertices
-    p1 = (0.0, 0.0)
-    p2 = (size, 0.0)
-    p3 = (size / 2, size * math.sin(math.radians(60)))
-    shapes: List[Shape] = []
-    for (a, b) in ((p1, p2), (p2, p3), (p3, p1)):
-        shapes.append(Shape(
-            name="line",
-            params={"x1": a[0], "y1": a[1], "x2": b[0], "y2": b[1],
-                    "hue": start.params.get("hue", 0)}
-        ))
-    return shapes
+    triangle = np.array([
+        (0.0, 0.0),
+        (size, 0.0),
+        (size / 2, size * math.sin(math.radians(60))),
+    ], dtype=np.float64)
+    segments = _koch_expand(triangle, depth)
+    segments.flags.writeable = False
+    return segments
+
+def generate_koch_snowflake(start: Shape, iterations: int = 3, **kwargs) -> List[Shape]:
+    # iterations=1 is the bare triangle; each further step refines every segment
+    hue = start.hue
+    depth = min(max(iterations - 1, 0), KOCH_MAX_DEPTH)
+    return [
+        Line("line", 0.0, 0.0, 1.0, 0.0, hue, x1, y1, x2, y2)
+        for x1, y1, x2, y2 in _koch_segments_cached(float(start.size), depth).tolist()
+    ]
 
 # --- Rule & Preset Registry --------------------------------------------------------
 
@@ -138,11 +333,33 @@ PRESETS = {
     "koch_snowflake": generate_koch_snowflake,
 }
 
+# Closed-form, array-at-once implementations of the primitive rules; every
+# entry of PRIMITIVE_RULES needs one, as sequences are only built this way
+VECTORIZED_RULES = {
+    "scale_by_diagonal": _seq_scale_by_diagonal,
+    "uniform_scale": _seq_uniform_scale,
+    "rotate": _seq_rotate,
+    "translate": _seq_translate,
+    "hue_shift": _seq_hue_shift,
+}
+
+# Shape fields each kernel rewrites; all others stay equal to the start shape
+VECTORIZED_FIELDS = {
+    "scale_by_diagonal": ("x", "size"),
+    "uniform_scale": ("x", "size"),
+    "rotate": ("angle",),
+    "translate": ("x", "y"),
+    "hue_shift": ("hue",),
+}
+
 # Combined keys for UI
 RULES = {**PRIMITIVE_RULES, **PRESETS}
 
 # --- Sequence Generation ----------------------------------------------------------
 
+# Rule parameters that take part in the sequence cache key
+CACHED_PARAMS = ("scale_factor", "rotation_increment", "translate_dx", "translate_dy", "hue_shift")
+
 def generate_sequence(
     start: Shape,
     rule_key: str,
@@ -152,19 +369,57 @@ def generate_sequence(
     """
     Generate shapes by either applying a primitive rule iteratively,
     or by invoking a preset generator.
+
+    Primitive rules that change the angle work at 0.1 degree resolution:
+    the start angle is rounded to it for the elements after the first, and
+    rotation_increment must be a multiple of it (ValueError otherwise).
     """
     if rule_key in PRESETS:
         return PRESETS[rule_key](start, iterations=iterations, **kwargs)
     if rule_key not in PRIMITIVE_RULES:
         raise ValueError(f"Unknown rule or preset: {rule_key}")
-    seq: List[Shape] = [start]
-    for _ in range(iterations - 1):
-        seq.append(PRIMITIVE_RULES[rule_key](seq[-1], **kwargs))
-    return seq
+    arr = generate_shape_array(start, rule_key, iterations, **kwargs)
+    return arr.to_shapes(start, VECTORIZED_FIELDS[rule_key])
+
+def generate_shape_array(
+    start: Shape,
+    rule_key: str,
+    iterations: int = 10,
+    **kwargs
+) -> ShapeArray:
+    """
+    Generate a primitive-rule sequence directly as a ShapeArray.
+
+    Results are memoized on the start shape's fields, the rule and its
+    parameters. The returned buffers are shared between calls and are
+    read-only; Shapes built from them are always fresh objects.
+    """
+    if rule_key not in VECTORIZED_RULES:
+        raise ValueError(f"Unknown primitive rule: {rule_key}")
+    if "angle" in VECTORIZED_FIELDS[rule_key] and not _is_decidegree(start.angle):
+        warnings.warn(f"start angle {start.angle} is rounded to 0.1 degrees", stacklevel=2)
+    return _shape_array_cached(
+        rule_key, start.name, start.x, start.y, start.size, start.angle, start.hue,
+        max(iterations, 1), *(kwargs.get(k) for k in CACHED_PARAMS)
+    )
+
+@functools.lru_cache(maxsize=64)
+def _shape_array_cached(
+    rule_key: str,
+    name: str, x: float, y: float, size: float, angle: float, hue: float,
+    iterations: int,
+    scale_factor, rotation_increment, translate_dx, translate_dy, hue_shift
+) -> ShapeArray:
+    # None marks a parameter the caller left out, so the rule default applies
+    values = (scale_factor, rotation_increment, translate_dx, translate_dy, hue_shift)
+    kwargs = {k: v for k, v in zip(CACHED_PARAMS, values) if v is not None}
+    arr = ShapeArray.full(Shape(name, x, y, size, angle, hue), iterations)
+    VECTORIZED_RULES[rule_key](arr, **kwargs)
+    return arr.freeze()
 
 if __name__ == "__main__":
     # CLI demo
-    s = Shape(name="square", params={"x": 0, "y": 0, "size": 100, "angle": 0, "hue": 0})
+    s = Shape(name="square", x=0, y=0, size=100, angle=0, hue=0)
     for key in RULES:
         seq = generate_sequence(s, key, iterations=5)
         print(f"Preset/Rule: {key}, generated {len(seq)} shapes")
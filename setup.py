@@ -6,8 +6,12 @@ setup(
     packages=find_packages(),    # will now pick up the matart/ folder
     install_requires=[
         "PySide6",
+        "numpy",
         "pycairo"
     ],
+    extras_require={
+        "jit": ["numba"],
+    },
     entry_points={
         "console_scripts": [
             "matart=matart.app:main"
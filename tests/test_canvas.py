@@ -0,0 +1,74 @@
+import os
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+QtWidgets = pytest.importorskip("PySide6.QtWidgets")
+
+from matart.canvas import CanvasWidget
+from matart.geometry import Line, Shape
+
+
+class RecordingCanvas(CanvasWidget):
+    def __init__(self):
+        super().__init__()
+        self.painted = []
+
+    def paintEvent(self, event):
+        self.painted.append(event.rect())
+        super().paintEvent(event)
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+def _shown_canvas(app):
+    canvas = RecordingCanvas()
+    canvas.resize(200, 150)
+    canvas.show()
+    canvas.add_shape(Shape(name="square", x=100, y=75, size=50))
+    app.processEvents()
+    canvas.painted.clear()
+    return canvas
+
+
+def _bounding_painted(canvas):
+    rect = canvas.painted[0]
+    for r in canvas.painted[1:]:
+        rect = rect.united(r)
+    return rect
+
+
+def test_resetting_shapes_repaints_whole_widget(app):
+    canvas = _shown_canvas(app)
+    canvas.shapes = []
+    canvas.add_shape(Shape(name="square", x=10, y=10, size=10))
+    app.processEvents()
+    assert _bounding_painted(canvas).contains(canvas.rect())
+
+
+def test_toggling_hue_colors_repaints_whole_widget(app):
+    canvas = _shown_canvas(app)
+    canvas.color_by_hue = True
+    app.processEvents()
+    assert _bounding_painted(canvas).contains(canvas.rect())
+
+
+def test_add_shape_repaints_only_its_rect(app):
+    canvas = _shown_canvas(app)
+    canvas.add_shape(Shape(name="square", x=10, y=10, size=10))
+    app.processEvents()
+    assert not _bounding_painted(canvas).contains(canvas.rect())
+
+
+def test_lines_are_drawn(app):
+    canvas = _shown_canvas(app)
+    line = Line(name="line", x1=20, y1=120, x2=180, y2=120)
+    canvas.add_shape(line)
+    incremental = canvas.grab().toImage()
+    canvas.shapes = list(canvas.shapes)
+    full = canvas.grab().toImage()
+    for image in (incremental, full):
+        assert image.pixelColor(100, 120).lightness() < 200
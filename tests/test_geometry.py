@@ -7,3 +7,193 @@ def test_cli_smoke():
     ]
     output = subprocess.check_output(cmd).decode()
     assert "Generated shape:" in output
+
+def test_vectorized_rules_match_stepwise():
+    from matart.geometry import Shape, PRIMITIVE_RULES, VECTORIZED_RULES, generate_sequence
+    start = Shape(name="square", x=5, y=3, size=100, angle=350, hue=20)
+    for key in VECTORIZED_RULES:
+        expected = [start]
+        for _ in range(7):
+            expected.append(PRIMITIVE_RULES[key](expected[-1]))
+        got = generate_sequence(start, key, iterations=8)
+        assert len(got) == len(expected)
+        for a, b in zip(got, expected):
+            # float64 fields agree to rounding error of the closed forms
+            for field in ("x", "y", "size", "hue"):
+                assert abs(getattr(a, field) - getattr(b, field)) <= 1e-9 * max(1, abs(getattr(b, field)))
+            # angles are stored in tenths of a degree
+            diff = abs(a.angle - b.angle) % 360
+            assert min(diff, 360 - diff) <= 0.05
+
+def test_generate_sequence_is_memoized():
+    from matart.geometry import Shape, generate_sequence, _shape_array_cached
+    start = Shape(name="circle", x=1, y=2, size=40)
+    first = generate_sequence(start, "uniform_scale", iterations=6, scale_factor=1.3)
+    hits = _shape_array_cached.cache_info().hits
+    second = generate_sequence(start, "uniform_scale", iterations=6, scale_factor=1.3)
+    assert _shape_array_cached.cache_info().hits == hits + 1
+    assert first == second and first is not second
+    assert generate_sequence(start, "uniform_scale", iterations=6, scale_factor=1.5) != first
+
+def test_long_sequences_stay_finite():
+    import math
+    from matart.geometry import Shape, PRIMITIVE_RULES, generate_sequence
+    start = Shape(name="square", size=100)
+    for key in PRIMITIVE_RULES:
+        seq = generate_sequence(start, key, iterations=500)
+        assert len(seq) == 500
+        for s in seq:
+            assert all(math.isfinite(v) for v in (s.x, s.y, s.size, s.angle, s.hue))
+
+def test_sequence_keeps_start_and_untouched_fields_exact():
+    from matart.geometry import Shape, PRIMITIVE_RULES, VECTORIZED_FIELDS, generate_sequence
+    import warnings
+    start = Shape(name="circle", x=0.1, y=-3.3, size=7.7, angle=12.34, hue=7.77)
+    for key in PRIMITIVE_RULES:
+        with warnings.catch_warnings():
+            # rotate rounds the off-grid start angle; only element 0 matters here
+            warnings.simplefilter("ignore")
+            seq = generate_sequence(start, key, iterations=5)
+        assert seq[0] == start
+        for field in ("x", "y", "size", "angle", "hue"):
+            if field not in VECTORIZED_FIELDS[key]:
+                assert all(getattr(s, field) == getattr(start, field) for s in seq)
+
+def test_rotate_increments_at_decidegree_resolution():
+    import pytest
+    from matart.geometry import Shape, generate_sequence, rule_rotate
+    start = Shape(name="square", angle=350)
+    for increment in (0.1, 0.5, 12.3, -45, 359.9):
+        expected = [start]
+        for _ in range(9):
+            expected.append(rule_rotate(expected[-1], rotation_increment=increment))
+        got = generate_sequence(start, "rotate", iterations=10, rotation_increment=increment)
+        for a, b in zip(got, expected):
+            diff = abs(a.angle - b.angle) % 360
+            assert min(diff, 360 - diff) <= 1e-9
+    for increment in (0.04, 0.15):
+        with pytest.raises(ValueError):
+            generate_sequence(start, "rotate", iterations=3, rotation_increment=increment)
+
+def test_rotate_warns_on_off_grid_start_angle():
+    import pytest
+    from matart.geometry import Shape, generate_sequence
+    start = Shape(name="square", angle=12.34)
+    with pytest.warns(UserWarning):
+        seq = generate_sequence(start, "rotate", iterations=2)
+    assert seq[0].angle == 12.34 and seq[1].angle == 42.3
+
+def test_every_primitive_rule_has_a_kernel():
+    from matart.geometry import PRIMITIVE_RULES, VECTORIZED_RULES, VECTORIZED_FIELDS
+    assert PRIMITIVE_RULES.keys() == VECTORIZED_RULES.keys() == VECTORIZED_FIELDS.keys()
+
+def test_cached_sequences_are_not_shared():
+    import pytest
+    from matart.geometry import Shape, generate_sequence, generate_shape_array
+    start = Shape(name="square", size=10)
+    seq = generate_sequence(start, "rotate", iterations=3)
+    seq[1].angle = 0.0
+    assert generate_sequence(start, "rotate", iterations=3)[1].angle == 30.0
+    with pytest.raises(ValueError):
+        generate_shape_array(start, "rotate", iterations=3).angles[1] = 0
+
+
+def _kernel_variants(kernel):
+    # the numba-compiled kernel plus its pure-Python original when numba is installed
+    return [kernel] + ([kernel.py_func] if hasattr(kernel, "py_func") else [])
+
+
+def _koch_kernels():
+    from matart.geometry import _koch_expand
+    return _kernel_variants(_koch_expand)
+
+
+def _triangle(size):
+    import math
+    import numpy as np
+    return np.array([(0.0, 0.0), (size, 0.0), (size / 2, size * math.sin(math.radians(60)))])
+
+
+def test_koch_expand_segments():
+    import numpy as np
+    size = 90.0
+    for kernel in _koch_kernels():
+        for depth in range(5):
+            segs = kernel(_triangle(size), depth).astype(np.float64)
+            assert segs.shape == (3 * 4 ** depth, 4)
+            # a closed chain: each segment starts where the previous one ended
+            np.testing.assert_allclose(segs[1:, :2], segs[:-1, 2:], atol=1e-3)
+            np.testing.assert_allclose(segs[0, :2], segs[-1, 2:], atol=1e-3)
+            lengths = np.hypot(segs[:, 2] - segs[:, 0], segs[:, 3] - segs[:, 1])
+            np.testing.assert_allclose(lengths, size / 3 ** depth, rtol=1e-4)
+
+
+def test_koch_expand_peaks_point_outward():
+    import numpy as np
+    size = 90.0
+    tri = _triangle(size)
+    centroid = tri.mean(axis=0)
+    base_area = np.sqrt(3) / 4 * size ** 2
+    for kernel in _koch_kernels():
+        segs = kernel(tri, 1).astype(np.float64)
+        for k in range(3):
+            peak = segs[4 * k + 1, 2:]
+            base_mid = (segs[4 * k, :2] + segs[4 * k + 3, 2:]) / 2
+            assert np.linalg.norm(peak - centroid) > np.linalg.norm(base_mid - centroid)
+        for depth in range(4):
+            pts = kernel(tri, depth).astype(np.float64)[:, :2]
+            x, y = pts[:, 0], pts[:, 1]
+            area = abs(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1))) / 2
+            # outward bumps grow the area towards 8/5 of the triangle
+            expected = base_area * (8 / 5 - 3 / 5 * (4 / 9) ** depth)
+            assert abs(area - expected) <= 1e-4 * expected
+
+
+def test_koch_snowflake_depth_is_clamped():
+    from matart.geometry import KOCH_MAX_DEPTH, Shape, generate_koch_snowflake
+    start = Shape(name="square", size=10)
+    assert len(generate_koch_snowflake(start, iterations=1)) == 3
+    assert len(generate_koch_snowflake(start, iterations=KOCH_MAX_DEPTH + 5)) == 3 * 4 ** KOCH_MAX_DEPTH
+
+
+def test_koch_cache_is_keyed_on_clamped_depth():
+    from matart.geometry import KOCH_MAX_DEPTH, Shape, generate_koch_snowflake, _koch_segments_cached
+    start = Shape(name="square", size=10)
+    generate_koch_snowflake(start, iterations=KOCH_MAX_DEPTH + 1)
+    misses = _koch_segments_cached.cache_info().misses
+    for extra in range(2, 12):
+        generate_koch_snowflake(start, iterations=KOCH_MAX_DEPTH + extra)
+    assert _koch_segments_cached.cache_info().misses == misses
+
+
+def test_fibonacci_spiral_matches_baseline():
+    from matart.geometry import Shape, _fib_spiral_core, generate_fibonacci_spiral
+    # values produced by the original pure-Python generator
+    expected = [
+        (0.0, 0.0, 1.0, 0.0),
+        (0.0, 1.0, 1.0, 90.0),
+        (-1.5, 1.0, 2.0, 180.0),
+        (-1.5, -1.5, 3.0, 270.0),
+        (2.5, -1.5, 5.0, 0.0),
+        (2.5, 5.0, 8.0, 90.0),
+    ]
+    for kernel in _kernel_variants(_fib_spiral_core):
+        assert [tuple(row) for row in kernel(0.0, 0.0, 1.0, 6).tolist()] == expected
+    seq = generate_fibonacci_spiral(Shape(name="square", size=1, hue=40), iterations=6)
+    assert [(s.x, s.y, s.size, s.angle) for s in seq] == expected
+    assert all(s.name == "square" and s.hue == 40 for s in seq)
+    assert len(generate_fibonacci_spiral(Shape(name="square"), iterations=1)) == 1
+
+
+def test_hues_to_rgb():
+    import numpy as np
+    from matart.geometry import hues_to_rgb
+    hues = np.array([0, 60, 120, 180, 240, 300, 30, 360, 420, -60, -300, 719.0])
+    expected = [
+        (255, 0, 0), (255, 255, 0), (0, 255, 0), (0, 255, 255),
+        (0, 0, 255), (255, 0, 255), (255, 128, 0),
+        (255, 0, 0), (255, 255, 0), (255, 0, 255), (255, 255, 0), (255, 0, 4),
+    ]
+    rgb = hues_to_rgb(hues)
+    assert rgb.dtype == np.uint8 and rgb.shape == (len(hues), 3)
+    assert [tuple(c) for c in rgb.tolist()] == expected